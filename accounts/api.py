@@ -1,38 +1,149 @@
-import json
-from datetime import time
+import re
+from datetime import datetime, time
+from itertools import chain
 
+import orjson
+
+from django.conf import settings
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q
-from django.http import HttpResponseForbidden, JsonResponse
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist
+from django.db import IntegrityError, connection, transaction
+from django.http import HttpResponse, HttpResponseForbidden, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from django.utils.dateparse import parse_datetime
 from django.views.decorators.http import require_http_methods
 
+from core.services import pg_constraint_name, pg_sqlstate
+
 from .models import Booking, MeetingRoom
+from .services import (
+    CALENDAR_CACHE_MAX_WEEKS,
+    ROOMS_CACHE_KEY,
+    ROOMS_CACHE_TIMEOUT,
+    bump_pending_bookings_version,
+    calendar_weeks,
+    get_approved_rows,
+    invalidate_calendar_cache,
+)
 
 
 # ===========================
 # WORKING HOURS CONFIG
 # ===========================
-WORK_DAYS = {0, 1, 2, 3, 4}  # Mon-Fri
-WORK_START = time(8, 0)     # 08:00
-WORK_END = time(20, 0)      # 20:00 (end may be exactly 20:00)
+# єдине джерело — settings.BOOKING_WORK_*
+WORK_DAYS = frozenset(settings.BOOKING_WORK_DAYS)
+WORK_START = time.fromisoformat(settings.BOOKING_WORK_START)
+WORK_END = time.fromisoformat(settings.BOOKING_WORK_END)  # end may be exactly WORK_END
+
+_DAY_NAMES = ("Пн", "Вт", "Ср", "Чт", "Пт", "Сб", "Нд")
+
+
+def _work_hours_label() -> str:
+    # "Пн–Пт, 08:00–20:00" для повідомлень про помилки
+    days = sorted(WORK_DAYS)
+    if len(days) > 1 and days == list(range(days[0], days[-1] + 1)):
+        days_label = f"{_DAY_NAMES[days[0]]}–{_DAY_NAMES[days[-1]]}"
+    else:
+        days_label = ", ".join(_DAY_NAMES[d] for d in days)
+    return f"{days_label}, {WORK_START:%H:%M}–{WORK_END:%H:%M}"
+
+
+WORK_HOURS_LABEL = _work_hours_label()
+
+# CHECK-констрейнти accounts_booking (міграції 0006, 0010) -> повідомлення
+_CHECK_ERRORS = {
+    "booking_end_after_start": "Кінець має бути після початку.",
+    "accounts_booking_work_hours": f"Бронювання дозволено тільки в робочий час ({WORK_HOURS_LABEL}).",
+}
+
+
+OVERLAP_ERROR = "Цей час уже зайнятий для вибраної переговорної."
+
+# на Postgres перетини відсікає EXCLUDE-констрейнт accounts_booking_no_overlap
+# (міграція 0007), тож окремий SELECT перед записом не потрібен
+_OVERLAP_IN_DB = connection.vendor == "postgresql"
+
+
+# ===========================
+# OPTIONAL MODEL FIELDS
+# ===========================
+# перевіряємо один раз при імпорті, а не hasattr на кожен запит/подію
+def _has_field(model, name: str) -> bool:
+    try:
+        model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return False
+    return True
+
+
+_HAS_TITLE = _has_field(Booking, "title")
+_HAS_COMMENT = _has_field(Booking, "comment")
+_HAS_APPROVED_BY = _has_field(Booking, "approved_by")
+_HAS_APPROVED_AT = _has_field(Booking, "approved_at")
+
+
+# ===========================
+# CALENDAR EVENTS
+# ===========================
+# поля, які реально читає календар (без password/last_login з auth_user)
+_EVENT_FIELDS = (
+    "id",
+    "start",
+    "end",
+    "status",
+    "room_id",
+    "user_id",
+    "room__name",
+    "user__username",
+)
+if _HAS_TITLE:
+    _EVENT_FIELDS += ("title",)
+
+# відхилені/скасовані не займають кімнату
+_INACTIVE_STATUSES = (Booking.Status.REJECTED, Booking.Status.CANCELLED)
+
+# підпис статусу без get_status_display() на кожну подію
+_STATUS_LABELS = dict(Booking.Status.choices)
+
+# колір події за статусом (все інше, тобто REJECTED, — червоним)
+_STATUS_COLORS = {
+    Booking.Status.APPROVED: "#2e7d32",
+    Booking.Status.PENDING: "#6c757d",
+    Booking.Status.CANCELLED: "#f57c00",
+}
+_DEFAULT_COLOR = "#b71c1c"
+
+# скільки рядків тягнути з БД за раз при стрімінгу подій
+EVENTS_CHUNK_SIZE = 500
+
+
+# orjson сам серіалізує datetime (aware -> "...Z", naive вважаємо UTC)
+_ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z
 
 
 # ===========================
 # HELPERS
 # ===========================
+def _json_response(data, *, status=200):
+    return HttpResponse(
+        orjson.dumps(data, option=_ORJSON_OPTIONS),
+        status=status,
+        content_type="application/json",
+    )
+
+
 def _json_ok(extra=None):
     data = {"ok": True}
     if extra:
         data.update(extra)
-    return JsonResponse(data)
+    return _json_response(data)
 
 
 def _json_error(message, *, status=400):
-    return JsonResponse({"ok": False, "error": message}, status=status)
+    return _json_response({"ok": False, "error": message}, status=status)
 
 
 def _parse_int(value, default=None):
@@ -42,23 +153,54 @@ def _parse_int(value, default=None):
         return default
 
 
+def _json_array_stream(items):
+    """Yield a JSON array element by element (for StreamingHttpResponse)."""
+    yield b"["
+    sep = b""
+    for item in items:
+        yield sep + orjson.dumps(item, option=_ORJSON_OPTIONS)
+        sep = b","
+    yield b"]"
+
+
+def _events_from_rows(rows, user_id):
+    """Turn .values(*_EVENT_FIELDS) rows into FullCalendar event dicts."""
+    # dict-рядки замість моделей: без Booking/MeetingRoom/User __init__ на кожну подію;
+    # глобали -> локальні імена, бо цикл гарячий
+    labels = _STATUS_LABELS
+    colors = _STATUS_COLORS
+    default_color = _DEFAULT_COLOR
+    has_title = _HAS_TITLE
+
+    for r in rows:
+        status = r["status"]
+        label = labels.get(status, status)
+        room_name = r["room__name"]
+        yield {
+            "id": r["id"],
+            "title": (has_title and r["title"]) or f"{room_name} ({label})",
+            "start": r["start"],
+            "end": r["end"],
+            "allDay": False,
+            "color": colors.get(status, default_color),
+            "extendedProps": {
+                "roomId": r["room_id"],
+                "roomName": room_name,
+                "status": status,
+                "statusLabel": label,
+                "isMine": r["user_id"] == user_id,
+                "bookedBy": r["user__username"],
+            },
+        }
+
+
 def _parse_body_json(request):
     try:
-        return json.loads(request.body.decode("utf-8"))
+        return orjson.loads(request.body)
     except Exception:
         return None
 
 
-def _booking_color(status: str) -> str:
-    if status == Booking.Status.APPROVED:
-        return "#2e7d32"
-    if status == Booking.Status.PENDING:
-        return "#6c757d"
-    if status == Booking.Status.CANCELLED:
-        return "#f57c00"
-    return "#b71c1c"
-
-
 def _ensure_aware(dt):
     if dt is None:
         return None
@@ -67,6 +209,28 @@ def _ensure_aware(dt):
     return timezone.make_aware(dt, timezone.get_current_timezone())
 
 
+def _parse_dt(value):
+    """
+    ISO-8601 string -> aware datetime (None if missing/invalid).
+    FullCalendar sends RFC 3339 with an offset, so the C-level
+    datetime.fromisoformat() handles it; parse_datetime() is the fallback.
+    """
+    if not isinstance(value, str):
+        return None
+    try:
+        dt = datetime.fromisoformat(value)
+    except ValueError:
+        try:
+            dt = parse_datetime(value)
+        except ValueError:
+            return None
+        if dt is None:
+            return None
+    if dt.tzinfo is None:
+        return timezone.make_aware(dt, timezone.get_current_timezone())
+    return dt
+
+
 def _to_local(dt):
     """Convert datetime to local timezone from settings (Europe/Kyiv)."""
     dt = _ensure_aware(dt)
@@ -79,8 +243,8 @@ def _is_within_working_hours(start, end) -> bool:
     """
     Booking must be:
       - same day
-      - Mon-Fri
-      - within 08:00..20:00 (end may be exactly 20:00)
+      - on WORK_DAYS
+      - within WORK_START..WORK_END (end may be exactly WORK_END)
     All checks are in LOCAL timezone.
     """
     if not start or not end:
@@ -114,28 +278,66 @@ def _is_within_working_hours(start, end) -> bool:
     return True
 
 
-def _has_overlap_active(*, room_id, start, end, exclude_id=None) -> bool:
+def _has_overlap_active(*, room_id, start, end, exclude_id=None, lock=False) -> bool:
     qs = (
         Booking.objects.filter(room_id=room_id)
-        .exclude(status__in=[Booking.Status.REJECTED, Booking.Status.CANCELLED])
+        .exclude(status__in=_INACTIVE_STATUSES)
         .filter(start__lt=end, end__gt=start)
     )
     if exclude_id is not None:
         qs = qs.exclude(id=exclude_id)
+    if lock and connection.features.has_select_for_update:
+        # FOR UPDATE на бронюваннях не рятує: вільний слот = нема рядків,
+        # і два паралельні запити обидва пройдуть перевірку. Тому блокуємо
+        # рядок кімнати — записи в ту саму кімнату чекають один одного
+        # до кінця transaction.atomic(). Без підтримки FOR UPDATE (SQLite)
+        # цей SELECT нічого б не блокував — тоді його не робимо зовсім.
+        list(
+            MeetingRoom.objects.select_for_update()
+            .filter(id=room_id)
+            .order_by()
+            .values_list("id", flat=True)
+        )
     return qs.exists()
 
 
-def _get_room_ids_from_query(request) -> list[int]:
-    rooms_raw = (request.GET.get("rooms") or "").strip()
-    if not rooms_raw:
-        return []
+def _is_overlap_violation(exc: IntegrityError) -> bool:
+    # SQLSTATE 23P01 = exclusion_violation
+    return pg_sqlstate(exc) == "23P01"
+
+
+def _check_violation_error(exc: IntegrityError) -> str | None:
+    # SQLSTATE 23514 = check_violation; повідомлення — за іменем констрейнта
+    if pg_sqlstate(exc) != "23514":
+        return None
+    return _CHECK_ERRORS.get(pg_constraint_name(exc))
+
+
+def _resolution_fields(request, status) -> dict:
+    """Fields for approve/reject as kwargs for QuerySet.update()."""
+    fields = {"status": status}
+    if _HAS_APPROVED_BY:
+        fields["approved_by"] = request.user
+    if _HAS_APPROVED_AT:
+        fields["approved_at"] = timezone.now()
+    return fields
 
-    room_ids = []
-    for x in rooms_raw.split(","):
-        x = x.strip()
-        if x.isdigit():
-            room_ids.append(int(x))
-    return room_ids
+
+_ROOM_ID_RE = re.compile(r"\d+")
+
+
+def _all_room_ids() -> list[int]:
+    # беремо з кешу /api/rooms/, якщо він уже прогрітий
+    rooms = cache.get(ROOMS_CACHE_KEY)
+    if rooms is None:
+        return list(MeetingRoom.objects.values_list("id", flat=True))
+    return [r["id"] for r in rooms]
+
+
+def _get_room_ids_from_query(request) -> list[int]:
+    # "1, 2,3" -> [1, 2, 3]; сміття між числами ігноруємо
+    rooms_raw = request.GET.get("rooms") or ""
+    return list(map(int, _ROOM_ID_RE.findall(rooms_raw)))
 
 
 # ===========================
@@ -144,61 +346,73 @@ def _get_room_ids_from_query(request) -> list[int]:
 @login_required
 @require_http_methods(["GET"])
 def api_rooms(request):
-    rooms = MeetingRoom.objects.all().order_by("name")
-    return JsonResponse(
-        [{"id": r.id, "name": r.name, "capacity": r.capacity} for r in rooms],
-        safe=False,
-    )
+    # sync: під WSGI (gunicorn) async-вʼюха лише додає async_to_sync/sync_to_async
+    rooms = cache.get(ROOMS_CACHE_KEY)
+    if rooms is None:
+        rooms = list(MeetingRoom.objects.order_by("name").values("id", "name", "capacity"))
+        cache.set(ROOMS_CACHE_KEY, rooms, ROOMS_CACHE_TIMEOUT)
+    return _json_response(rooms)
 
 
 @login_required
 @require_http_methods(["GET", "POST"])
 def api_bookings(request):
     if request.method == "GET":
-        start = request.GET.get("start")
-        end = request.GET.get("end")
+        # один раз на запит, а не на кожну подію
+        user_id = request.user.id
+        is_staff = request.user.is_staff
+        approved = Booking.Status.APPROVED
+
+        start_dt = _parse_dt(request.GET.get("start"))
+        end_dt = _parse_dt(request.GET.get("end"))
 
-        qs = Booking.objects.select_related("room", "user")
+        qs = Booking.objects.all()
         room_ids = _get_room_ids_from_query(request)
 
-        if start and end:
-            start_dt = _ensure_aware(parse_datetime(start))
-            end_dt = _ensure_aware(parse_datetime(end))
-            if start_dt and end_dt:
-                qs = qs.filter(start__lt=end_dt, end__gt=start_dt)
+        if start_dt and end_dt:
+            qs = qs.filter(start__lt=end_dt, end__gt=start_dt)
 
         if room_ids:
             qs = qs.filter(room_id__in=room_ids)
 
-        if not request.user.is_staff:
-            qs = qs.filter(Q(status=Booking.Status.APPROVED) | Q(user=request.user))
-
-        events = []
-        for b in qs:
-            title = f"{b.room.name} ({b.get_status_display()})"
-            if getattr(b, "title", ""):
-                title = b.title
-
-            events.append(
-                {
-                    "id": b.id,
-                    "title": title,
-                    "start": b.start.isoformat(),
-                    "end": b.end.isoformat(),
-                    "allDay": False,
-                    "color": _booking_color(b.status),
-                    "extendedProps": {
-                        "roomId": b.room_id,
-                        "roomName": b.room.name,
-                        "status": b.status,
-                        "statusLabel": b.get_status_display(),
-                        "isMine": b.user_id == request.user.id,
-                        "bookedBy": b.user.username,
-                    },
-                }
+        rows = qs.values(*_EVENT_FIELDS)
+
+        weeks = []
+        if start_dt and end_dt and start_dt < end_dt:
+            weeks = calendar_weeks(start_dt, end_dt)
+
+        if 0 < len(weeks) <= CALENDAR_CACHE_MAX_WEEKS:
+            # APPROVED — спільні для всіх, з кешу (кімната, тиждень);
+            # з БД — тільки непідтверджені: свої, а для staff — усі
+            # ключі кешу — тільки для існуючих кімнат: вигадані id з ?rooms=
+            # інакше засмічують кеш порожніми бакетами й витісняють справжні
+            cache_room_ids = _all_room_ids()
+            if room_ids:
+                requested = set(room_ids)
+                cache_room_ids = [r for r in cache_room_ids if r in requested]
+            approved_rows = get_approved_rows(
+                cache_room_ids, weeks, start_dt, end_dt, _EVENT_FIELDS
             )
-
-        return JsonResponse(events, safe=False)
+            others = rows.exclude(status=approved)
+            if not is_staff:
+                others = others.filter(user_id=user_id)
+            rows = chain(approved_rows, others.iterator(chunk_size=EVENTS_CHUNK_SIZE))
+        else:
+            if not is_staff:
+                # UNION ALL двох простих умов замість OR (BitmapOr у Postgres):
+                # усі підтверджені + власні непідтверджені
+                approved_rows = rows.filter(status=approved).order_by()
+                mine = rows.filter(user_id=user_id).exclude(status=approved).order_by()
+                rows = approved_rows.union(mine, all=True).order_by("-start")
+            rows = rows.iterator(chunk_size=EVENTS_CHUNK_SIZE)
+
+        # iterator() + стрімінг — не тримаємо в памʼяті весь список і весь JSON
+        events = _events_from_rows(rows, user_id)
+
+        return StreamingHttpResponse(
+            _json_array_stream(events),
+            content_type="application/json",
+        )
 
     # POST: create booking
     payload = _parse_body_json(request)
@@ -209,41 +423,48 @@ def api_bookings(request):
     if room_id is None:
         room_id = _parse_int(payload.get("roomId"), default=None)
 
-    start = _ensure_aware(parse_datetime(payload.get("start")))
-    end = _ensure_aware(parse_datetime(payload.get("end")))
+    start = _parse_dt(payload.get("start"))
+    end = _parse_dt(payload.get("end"))
 
     if room_id is None or not start or not end:
         return _json_error("Missing/invalid fields", status=400)
 
-    room = MeetingRoom.objects.filter(id=room_id).first()
-    if not room:
-        return _json_error("Room not found", status=404)
-
     if not _is_within_working_hours(start, end):
         return _json_error(
-            "Бронювання дозволено тільки в робочий час (Пн–Пт, 08:00–20:00).",
+            f"Бронювання дозволено тільки в робочий час ({WORK_HOURS_LABEL}).",
             status=400,
         )
 
-    if _has_overlap_active(room_id=room_id, start=start, end=end):
-        return _json_error("Цей час уже зайнятий для вибраної переговорної.", status=400)
-
+    # без окремого SELECT кімнати: неіснуючий room_id відсіче FK
     booking = Booking(
-        room=room,
+        room_id=room_id,
         user=request.user,
         start=start,
         end=end,
         status=Booking.Status.PENDING,
     )
 
-    if hasattr(booking, "title"):
+    if _HAS_TITLE:
         booking.title = (payload.get("title") or "").strip()
-    if hasattr(booking, "comment"):
+    if _HAS_COMMENT:
         booking.comment = (payload.get("comment") or "").strip()
 
+    # перевірка перетину + insert в одній транзакції;
+    # Booking.clean() не викликаємо — перетин уже перевірено тут (або в БД)
     try:
-        booking.full_clean()
-        booking.save()
+        with transaction.atomic():
+            if not _OVERLAP_IN_DB and _has_overlap_active(
+                room_id=room_id, start=start, end=end, lock=True
+            ):
+                return _json_error(OVERLAP_ERROR, status=400)
+            booking.save()
+    except IntegrityError as e:
+        if _is_overlap_violation(e):
+            return _json_error(OVERLAP_ERROR, status=400)
+        check_error = _check_violation_error(e)
+        if check_error:
+            return _json_error(check_error, status=400)
+        return _json_error("Room not found", status=404)
     except Exception as e:
         return _json_error(str(e), status=400)
 
@@ -253,14 +474,26 @@ def api_bookings(request):
 @login_required
 @require_http_methods(["POST"])
 def api_booking_cancel(request, booking_id):
-    booking = get_object_or_404(Booking, id=booking_id)
-
-    if booking.user_id != request.user.id and not request.user.is_staff:
-        return HttpResponseForbidden("Недостатньо прав")
-
-    if booking.status not in [Booking.Status.CANCELLED, Booking.Status.REJECTED]:
-        booking.status = Booking.Status.CANCELLED
-        booking.save(update_fields=["status"])
+    qs = Booking.objects.filter(id=booking_id)
+    if not request.user.is_staff:
+        qs = qs.filter(user=request.user)
+
+    # один UPDATE з умовою замість SELECT + save()
+    updated = qs.filter(
+        status__in=[Booking.Status.PENDING, Booking.Status.APPROVED],
+    ).update(status=Booking.Status.CANCELLED)
+
+    if not updated:
+        # нічого не оновили: нема запису, чуже бронювання або вже закрите
+        booking = get_object_or_404(Booking.objects.only("user_id"), id=booking_id)
+        if booking.user_id != request.user.id and not request.user.is_staff:
+            return HttpResponseForbidden("Недостатньо прав")
+        return _json_ok()
+
+    # update() не шле post_save — скидаємо кеші вручну
+    room_id, start, end = Booking.objects.values_list("room_id", "start", "end").get(id=booking_id)
+    invalidate_calendar_cache(room_id, start, end)
+    bump_pending_bookings_version()
 
     return _json_ok()
 
@@ -268,50 +501,60 @@ def api_booking_cancel(request, booking_id):
 @staff_member_required
 @require_http_methods(["POST"])
 def api_booking_approve(request, booking_id):
-    booking = get_object_or_404(Booking, id=booking_id)
+    booking = get_object_or_404(
+        Booking.objects.only("id", "room_id", "start", "end", "status"),
+        id=booking_id,
+    )
 
     if booking.status != Booking.Status.PENDING:
         return _json_error("Not pending", status=400)
 
     if not _is_within_working_hours(booking.start, booking.end):
         return _json_error(
-            "Не можна підтвердити бронювання поза робочим часом (Пн–Пт, 08:00–20:00).",
+            f"Не можна підтвердити бронювання поза робочим часом ({WORK_HOURS_LABEL}).",
             status=400,
         )
 
-    if _has_overlap_active(
-        room_id=booking.room_id,
-        start=booking.start,
-        end=booking.end,
-        exclude_id=booking.id,
-    ):
-        return _json_error("Цей час уже зайнятий для вибраної переговорної.", status=400)
-
-    booking.status = Booking.Status.APPROVED
-
-    if hasattr(booking, "approved_by_id"):
-        booking.approved_by = request.user
-    if hasattr(booking, "approved_at"):
-        booking.approved_at = timezone.now()
+    try:
+        with transaction.atomic():
+            if not _OVERLAP_IN_DB and _has_overlap_active(
+                room_id=booking.room_id,
+                start=booking.start,
+                end=booking.end,
+                exclude_id=booking.id,
+                lock=True,
+            ):
+                return _json_error(OVERLAP_ERROR, status=400)
+
+            # умова status=PENDING: паралельний approve/reject не перезапише результат
+            updated = Booking.objects.filter(
+                id=booking.id,
+                status=Booking.Status.PENDING,
+            ).update(**_resolution_fields(request, Booking.Status.APPROVED))
+    except IntegrityError as e:
+        if not _is_overlap_violation(e):
+            raise
+        return _json_error(OVERLAP_ERROR, status=400)
+
+    if not updated:
+        return _json_error("Not pending", status=400)
 
-    booking.save()
+    invalidate_calendar_cache(booking.room_id, booking.start, booking.end)
+    bump_pending_bookings_version()
     return _json_ok()
 
 
 @staff_member_required
 @require_http_methods(["POST"])
 def api_booking_reject(request, booking_id):
-    booking = get_object_or_404(Booking, id=booking_id)
+    updated = Booking.objects.filter(
+        id=booking_id,
+        status=Booking.Status.PENDING,
+    ).update(**_resolution_fields(request, Booking.Status.REJECTED))
 
-    if booking.status != Booking.Status.PENDING:
+    if not updated:
+        get_object_or_404(Booking.objects.only("id"), id=booking_id)
         return _json_error("Not pending", status=400)
 
-    booking.status = Booking.Status.REJECTED
-
-    if hasattr(booking, "approved_by_id"):
-        booking.approved_by = request.user
-    if hasattr(booking, "approved_at"):
-        booking.approved_at = timezone.now()
-
-    booking.save()
+    bump_pending_bookings_version()
     return _json_ok()
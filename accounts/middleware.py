@@ -0,0 +1,72 @@
+import logging
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+logger = logging.getLogger("perf")
+
+
+# ---------------------------
+# slow booking queries (DEBUG)
+# ---------------------------
+class SlowBookingQueryMiddleware:
+    """
+    DEBUG-only: logs slow SELECTs on the booking tables with their plan,
+    so a lost index (seq scan instead of the partial indexes) shows up in dev.
+    """
+
+    def __init__(self, get_response):
+        # connection.queries заповнюється тільки з DEBUG=True
+        if not settings.DEBUG:
+            raise MiddlewareNotUsed
+
+        self.get_response = get_response
+        self.threshold = settings.PERF_SLOW_QUERY_MS / 1000
+        self.tables = tuple(
+            f'"{apps.get_model(label)._meta.db_table}"'
+            for label in ("accounts.Booking", "booking.Booking")
+        )
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        # Django чистить queries_log на request_started, тож тут лише запити
+        # цього запиту; копія — бо EXPLAIN теж потрапить у лог.
+        # Запити, що виконуються під час стрімінгу відповіді, сюди не доходять.
+        for query in list(connection.queries_log):
+            if self._is_slow_booking_select(query):
+                self._log_plan(request, query)
+
+        return response
+
+    def _is_slow_booking_select(self, query) -> bool:
+        sql = query["sql"]
+        return (
+            float(query["time"]) >= self.threshold
+            and sql.lstrip().upper().startswith("SELECT")
+            and any(table in sql for table in self.tables)
+        )
+
+    def _log_plan(self, request, query):
+        # sql у queries_log вже з підставленими параметрами
+        if connection.vendor == "postgresql":
+            explain = "EXPLAIN (ANALYZE, BUFFERS) "
+        else:
+            explain = "EXPLAIN QUERY PLAN "
+
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(explain + query["sql"])
+                plan = "\n".join(" ".join(str(col) for col in row) for row in cursor.fetchall())
+        except Exception as exc:
+            plan = f"(EXPLAIN failed: {exc})"
+
+        logger.warning(
+            "slow booking query %sms on %s\n%s\n%s",
+            round(float(query["time"]) * 1000, 1),
+            request.path,
+            query["sql"],
+            plan,
+        )
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.2 on 2026-10-15 21:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_create_render_admin'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['room', 'status', 'start', 'end'], name='booking_room_status_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('status__in', ['PENDING', 'APPROVED'])), fields=['room', 'start', 'end'], name='booking_active_time_idx'),
+        ),
+    ]
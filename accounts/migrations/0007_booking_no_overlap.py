@@ -0,0 +1,39 @@
+from django.db import migrations
+
+
+# EXCLUDE-констрейнт є тільки в Postgres; на інших БД перетини
+# й далі перевіряє accounts.api._has_overlap_active()
+CONSTRAINT_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS btree_gist",
+    'ALTER TABLE accounts_booking ADD CONSTRAINT accounts_booking_no_overlap '
+    'EXCLUDE USING gist (room_id WITH =, tstzrange("start", "end") WITH &&) '
+    "WHERE (status IN ('PENDING', 'APPROVED'))",
+]
+
+
+def add_no_overlap(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    for sql in CONSTRAINT_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_no_overlap(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    schema_editor.execute(
+        "ALTER TABLE accounts_booking DROP CONSTRAINT IF EXISTS accounts_booking_no_overlap"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0006_booking_end_after_start"),
+    ]
+
+    operations = [
+        migrations.RunPython(add_no_overlap, drop_no_overlap),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 6.0.2 on 2026-10-15 21:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_booking_no_overlap'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('status', 'PENDING')), fields=['status', 'start'], name='booking_pending_start_idx'),
+        ),
+    ]
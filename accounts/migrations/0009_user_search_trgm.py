@@ -0,0 +1,38 @@
+from django.db import migrations
+
+
+# пошук в admin_users — icontains, у Postgres це UPPER(col::text) LIKE UPPER('%q%');
+# btree тут не допомагає, а trigram GIN по тому ж виразу — так
+SEARCH_FIELDS = ("username", "email", "first_name", "last_name")
+
+
+def add_trgm_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for field in SEARCH_FIELDS:
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS auth_user_{field}_trgm "
+            f'ON auth_user USING gin (UPPER("{field}"::text) gin_trgm_ops)'
+        )
+
+
+def drop_trgm_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    for field in SEARCH_FIELDS:
+        schema_editor.execute(f"DROP INDEX IF EXISTS auth_user_{field}_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0008_booking_pending_start_idx"),
+        ("auth", "0012_alter_user_first_name_max_length"),
+    ]
+
+    operations = [
+        migrations.RunPython(add_trgm_indexes, drop_trgm_indexes),
+    ]
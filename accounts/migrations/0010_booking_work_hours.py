@@ -0,0 +1,45 @@
+from django.db import migrations
+
+
+# робочий час — ті самі правила, що й accounts.api._is_within_working_hours():
+# один день, пн–пт, 08:00–20:00 у локальному часі.
+# Тільки Postgres: на SQLite такі вирази потребують Python-функцій Django.
+# Значення зафіксовані на момент міграції (TIME_ZONE, BOOKING_WORK_*):
+# якщо політика зміниться — потрібна нова міграція з оновленим CHECK-ом.
+START = "(\"start\" AT TIME ZONE 'Europe/Kyiv')"
+END = "(\"end\" AT TIME ZONE 'Europe/Kyiv')"
+
+# NOT VALID: старі рядки не перевіряємо, нові — так
+CONSTRAINT_SQL = (
+    "ALTER TABLE accounts_booking ADD CONSTRAINT accounts_booking_work_hours "
+    f"CHECK ({START}::date = {END}::date "
+    f"AND EXTRACT(ISODOW FROM {START}) BETWEEN 1 AND 5 "
+    f"AND {START}::time >= '08:00' AND {END}::time <= '20:00') NOT VALID"
+)
+
+
+def add_work_hours(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    schema_editor.execute(CONSTRAINT_SQL)
+
+
+def drop_work_hours(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    schema_editor.execute(
+        "ALTER TABLE accounts_booking DROP CONSTRAINT IF EXISTS accounts_booking_work_hours"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0009_user_search_trgm"),
+    ]
+
+    operations = [
+        migrations.RunPython(add_work_hours, drop_work_hours),
+    ]
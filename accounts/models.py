@@ -1,7 +1,7 @@
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import models
-from django.db.models import Q
+from django.db.models import F, Q
 
 
 # ---------------------------
@@ -61,6 +61,31 @@ class Booking(models.Model):
 
     class Meta:
         ordering = ["-start"]
+        indexes = [
+            # перевірка перетину: room + status + інтервал
+            models.Index(
+                fields=["room", "status", "start", "end"],
+                name="booking_room_status_time_idx",
+            ),
+            # тільки активні бронювання (PENDING + APPROVED)
+            models.Index(
+                fields=["room", "start", "end"],
+                name="booking_active_time_idx",
+                condition=Q(status__in=["PENDING", "APPROVED"]),
+            ),
+            # список заявок на підтвердження: status=PENDING ORDER BY start
+            models.Index(
+                fields=["status", "start"],
+                name="booking_pending_start_idx",
+                condition=Q(status="PENDING"),
+            ),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                condition=Q(start__lt=F("end")),
+                name="booking_end_after_start",
+            ),
+        ]
 
     def clean(self):
         # базова перевірка дат
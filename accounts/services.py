@@ -1,15 +1,33 @@
+import uuid
 from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+from operator import itemgetter
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
 
-from .models import MeetingRoom
+from core.services import pg_constraint_name
+
+from .models import Booking, MeetingRoom
 
 User = get_user_model()
 
 MIN_PASSWORD_LEN = 6
 
+# TTL кешів: зі спільним кешем (Redis) інвалідацію бачать усі воркери, тож
+# тримаємо довго; з locmem інші воркери про неї не дізнаються — лише коротко
+_CACHE_IS_SHARED = settings.CACHE_IS_SHARED
+LOCAL_CACHE_TIMEOUT = 30
+
+
+def _cache_timeout(shared_timeout: int) -> int:
+    return shared_timeout if _CACHE_IS_SHARED else LOCAL_CACHE_TIMEOUT
+
 
 @dataclass
 class CreateUserResult:
@@ -20,7 +38,8 @@ class CreateUserResult:
 # ---------------------------
 # users
 # ---------------------------
-def _password_error(p1: str, p2: str) -> str | None:
+def password_error(p1: str, p2: str) -> str | None:
+    # спершу дешеві перевірки, потім валідатори Django
     if p1 != p2:
         return "Паролі не співпадають."
     if len(p1) < MIN_PASSWORD_LEN:
@@ -34,6 +53,17 @@ def _password_error(p1: str, p2: str) -> str | None:
     return None
 
 
+def is_username_conflict(exc: IntegrityError) -> bool:
+    """True if exc is the unique violation on User.username."""
+    table = User._meta.db_table
+    constraint = pg_constraint_name(exc)
+    if constraint is not None:
+        # Postgres: імʼя констрейнта, який він створює для unique=True
+        return constraint == f"{table}_username_key"
+    # SQLite: "UNIQUE constraint failed: auth_user.username"
+    return f"{table}.username" in str(exc)
+
+
 def create_user_by_admin(
     *,
     username: str,
@@ -50,10 +80,8 @@ def create_user_by_admin(
 
     if not username:
         return CreateUserResult(False, "Username обовʼязковий.")
-    if User.objects.filter(username=username).exists():
-        return CreateUserResult(False, "Такий username вже існує.")
 
-    err = _password_error(password1 or "", password2 or "")
+    err = password_error(password1 or "", password2 or "")
     if err:
         return CreateUserResult(False, err)
 
@@ -67,7 +95,15 @@ def create_user_by_admin(
         is_active=is_active,
     )
     user.set_password(password1)
-    user.save()
+
+    # унікальність username перевіряє БД — один INSERT без попереднього SELECT
+    try:
+        with transaction.atomic():
+            user.save()
+    except IntegrityError as exc:
+        if not is_username_conflict(exc):
+            raise
+        return CreateUserResult(False, "Такий username вже існує.")
 
     return CreateUserResult(True)
 
@@ -75,11 +111,46 @@ def create_user_by_admin(
 # ---------------------------
 # rooms
 # ---------------------------
+# список кімнат для календаря (/api/rooms/) — міняється рідко
+ROOMS_CACHE_KEY = "rooms:api:v1"
+ROOMS_CACHE_TIMEOUT = _cache_timeout(60 * 15)
+
+# таблиця кімнат в адмінці
+ROOMS_LIST_CACHE_KEY = "rooms:list:v1"
+ROOMS_LIST_CACHE_TIMEOUT = _cache_timeout(60 * 60)
+ROOMS_LIST_FIELDS = (
+    "id",
+    "name",
+    "capacity",
+    "has_projector",
+    "has_speakerphone",
+    "has_tv",
+    "has_whiteboard",
+)
+
+
+def get_rooms_list() -> list[dict]:
+    rooms = cache.get(ROOMS_LIST_CACHE_KEY)
+    if rooms is None:
+        # dict-и, а не моделі: менший і простіший payload у кеші
+        rooms = list(MeetingRoom.objects.order_by("name").values(*ROOMS_LIST_FIELDS))
+        cache.set(ROOMS_LIST_CACHE_KEY, rooms, ROOMS_LIST_CACHE_TIMEOUT)
+    return rooms
+
+
+def invalidate_rooms_cache() -> None:
+    # викликається з signals.py на збереження/видалення кімнати
+    cache.delete_many([ROOMS_CACHE_KEY, ROOMS_LIST_CACHE_KEY])
+
+
 def _parse_int(value, default: int = 0) -> int:
-    try:
-        return int((value or "").strip())
-    except (TypeError, ValueError):
-        return default
+    # тільки невідʼємні цілі з форми; без try/except на кожне порожнє поле
+    value = (value or "").strip()
+    return int(value) if value.isdecimal() else default
+
+
+# булеві поля кімнати, що приходять чекбоксами з форм
+ROOM_FLAGS = ("has_projector", "has_speakerphone", "has_tv", "has_whiteboard")
 
 
 def update_meeting_room_from_post(room: MeetingRoom, post) -> None:
@@ -87,7 +158,113 @@ def update_meeting_room_from_post(room: MeetingRoom, post) -> None:
     room.capacity = _parse_int(post.get("capacity"), default=0)
 
     # чекбокси просто: є ключ -> True
-    room.has_projector = "has_projector" in post
-    room.has_speakerphone = "has_speakerphone" in post
-    room.has_tv = "has_tv" in post
-    room.has_whiteboard = "has_whiteboard" in post
+    for flag in ROOM_FLAGS:
+        setattr(room, flag, flag in post)
+
+
+# ---------------------------
+# pending bookings
+# ---------------------------
+# версія для {% cache %}-фрагмента таблиці заявок; нова версія = нові ключі
+_PENDING_GEN_KEY = "pending:gen"
+PENDING_CACHE_TIMEOUT = _cache_timeout(60 * 60)
+
+
+def pending_bookings_version() -> str:
+    return cache.get_or_set(_PENDING_GEN_KEY, lambda: uuid.uuid4().hex, None)
+
+
+def bump_pending_bookings_version() -> None:
+    cache.set(_PENDING_GEN_KEY, uuid.uuid4().hex, None)
+
+
+# ---------------------------
+# calendar cache
+# ---------------------------
+# APPROVED-бронювання однакові для всіх користувачів, тож кешуємо їх
+# по (кімната, локальний тиждень); непідтверджені завжди читаються з БД
+CALENDAR_CACHE_TIMEOUT = _cache_timeout(60 * 5)
+CALENDAR_CACHE_MAX_WEEKS = 6  # ширші вікна (напр. список за рік) йдуть напряму в БД
+
+# "покоління" ключів: зміна кімнат (назва у рядках) скидає весь кеш календаря
+_CALENDAR_GEN_KEY = "cal:gen"
+
+
+def calendar_weeks(start, end) -> list:
+    """Local Mondays of every week that [start, end) touches."""
+    first = timezone.localdate(start)
+    last = timezone.localdate(end - timedelta(microseconds=1))
+    week = first - timedelta(days=first.weekday())
+
+    weeks = []
+    while week <= last:
+        weeks.append(week)
+        week += timedelta(days=7)
+    return weeks
+
+
+def _week_bounds(week):
+    start = timezone.make_aware(datetime.combine(week, time.min))
+    end = timezone.make_aware(datetime.combine(week + timedelta(days=7), time.min))
+    return start, end
+
+
+def _calendar_keys(room_ids, weeks) -> dict:
+    gen = cache.get_or_set(_CALENDAR_GEN_KEY, lambda: uuid.uuid4().hex, None)
+    return {
+        f"cal:{gen}:{room_id}:{week.isoformat()}": (room_id, week)
+        for room_id in room_ids
+        for week in weeks
+    }
+
+
+def get_approved_rows(room_ids, weeks, start, end, fields) -> list[dict]:
+    """
+    APPROVED bookings of room_ids overlapping [start, end) as .values(*fields)
+    rows. Misses for all (room, week) pairs are filled with a single query.
+    """
+    keys = _calendar_keys(room_ids, weeks)
+    buckets = cache.get_many(keys)
+
+    missing = {key: pair for key, pair in keys.items() if key not in buckets}
+    if missing:
+        key_by_pair = {pair: key for key, pair in missing.items()}
+        miss_weeks = sorted({week for _, week in missing.values()})
+        lo = _week_bounds(miss_weeks[0])[0]
+        hi = _week_bounds(miss_weeks[-1])[1]
+
+        fresh = {key: [] for key in missing}
+        rows = Booking.objects.filter(
+            status=Booking.Status.APPROVED,
+            room_id__in={room_id for room_id, _ in missing.values()},
+            start__lt=hi,
+            end__gt=lo,
+        ).values(*fields)
+        for row in rows:
+            for week in calendar_weeks(row["start"], row["end"]):
+                key = key_by_pair.get((row["room_id"], week))
+                if key is not None:
+                    fresh[key].append(row)
+
+        cache.set_many(fresh, CALENDAR_CACHE_TIMEOUT)
+        buckets.update(fresh)
+
+    # бакети ширші за вікно, а бронювання на межі тижнів лежить у двох
+    seen = set()
+    result = []
+    for bucket in buckets.values():
+        for row in bucket:
+            if row["id"] not in seen and row["start"] < end and row["end"] > start:
+                seen.add(row["id"])
+                result.append(row)
+
+    result.sort(key=itemgetter("start"), reverse=True)
+    return result
+
+
+def invalidate_calendar_cache(room_id, start, end) -> None:
+    cache.delete_many(list(_calendar_keys([room_id], calendar_weeks(start, end))))
+
+
+def reset_calendar_cache() -> None:
+    cache.set(_CALENDAR_GEN_KEY, uuid.uuid4().hex, None)
@@ -0,0 +1,89 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .models import Booking, MeetingRoom
+from .services import (
+    bump_pending_bookings_version,
+    invalidate_calendar_cache,
+    invalidate_rooms_cache,
+    reset_calendar_cache,
+)
+
+
+# ---------------------------
+# rooms
+# ---------------------------
+@receiver([post_save, post_delete], sender=MeetingRoom)
+def _rooms_changed(sender, **kwargs):
+    invalidate_rooms_cache()
+    # у закешованих подіях календаря і таблиці заявок є назва кімнати
+    reset_calendar_cache()
+    bump_pending_bookings_version()
+
+
+# ---------------------------
+# bookings
+# ---------------------------
+# QuerySet.update() сигналів не шле — api.py інвалідовує ці шляхи сам
+_CALENDAR_SLOT_FIELDS = ("room_id", "start", "end")
+
+
+def _calendar_slot(instance) -> tuple:
+    return tuple(getattr(instance, f) for f in _CALENDAR_SLOT_FIELDS)
+
+
+def _invalidate_slot(slot) -> None:
+    if None in slot:
+        # старе місце невідоме (відкладені поля) — скидаємо весь кеш календаря
+        reset_calendar_cache()
+    else:
+        invalidate_calendar_cache(*slot)
+
+
+@receiver(post_init, sender=Booking)
+def _remember_calendar_slot(sender, instance, **kwargs):
+    # де бронювання лежить у кеші до змін; відкладені поля не читаємо (без SELECT)
+    instance._calendar_slot = tuple(instance.__dict__.get(f) for f in _CALENDAR_SLOT_FIELDS)
+
+
+@receiver(post_save, sender=Booking)
+def _booking_saved(sender, instance, created, **kwargs):
+    bump_pending_bookings_version()
+
+    old = instance._calendar_slot
+    new = instance._calendar_slot = _calendar_slot(instance)
+
+    if created:
+        # нова заявка не змінює підтверджених подій
+        if instance.status == Booking.Status.APPROVED:
+            invalidate_calendar_cache(*new)
+        return
+
+    # перенесене бронювання чистимо і зі старих тижнів/кімнати
+    invalidate_calendar_cache(*new)
+    if old != new:
+        _invalidate_slot(old)
+
+
+@receiver(post_delete, sender=Booking)
+def _booking_deleted(sender, instance, **kwargs):
+    bump_pending_bookings_version()
+
+    new = _calendar_slot(instance)
+    invalidate_calendar_cache(*new)
+    if instance._calendar_slot != new:
+        _invalidate_slot(instance._calendar_slot)
+
+
+# ---------------------------
+# users
+# ---------------------------
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def _user_saved(sender, created, update_fields=None, **kwargs):
+    # у закешованих подіях і таблиці заявок є username;
+    # вхід (last_login), пароль, профіль зберігаються з update_fields без нього
+    if created or (update_fields is not None and "username" not in update_fields):
+        return
+    reset_calendar_cache()
+    bump_pending_bookings_version()
@@ -1,3 +1,101 @@
+import json
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Booking, MeetingRoom
+
+User = get_user_model()
+
+
+def _next_monday(hour: int) -> datetime:
+    today = timezone.localdate()
+    day = today + timedelta(days=7 - today.weekday())
+    return timezone.make_aware(datetime(day.year, day.month, day.day, hour))
+
+
+# ---------------------------
+# calendar cache
+# ---------------------------
+class CalendarCacheInvalidationTests(TestCase):
+    """Cached APPROVED events must follow moves, approve, cancel and renames."""
+
+    def setUp(self):
+        cache.clear()
+        self.staff = User.objects.create_user("boss", password="x", is_staff=True)
+        self.user = User.objects.create_user("u1", password="x")
+        self.room = MeetingRoom.objects.create(name="A", capacity=4)
+
+        self.start = _next_monday(10)
+        self.window = (self.start - timedelta(days=1), self.start + timedelta(days=14))
+
+    def _events(self):
+        self.client.force_login(self.user)
+        start, end = self.window
+        resp = self.client.get(
+            "/api/bookings/", {"start": start.isoformat(), "end": end.isoformat()}
+        )
+        self.assertEqual(resp.status_code, 200)
+        return b"".join(resp.streaming_content).decode()
+
+    def _event_starts(self, booking_id):
+        return [
+            parse_datetime(e["start"])
+            for e in json.loads(self._events())
+            if e["id"] == booking_id
+        ]
+
+    def _booking(self, status):
+        return Booking.objects.create(
+            room=self.room,
+            user=self.staff,
+            start=self.start,
+            end=self.start + timedelta(hours=1),
+            status=status,
+        )
+
+    def test_moved_booking_leaves_old_week(self):
+        booking = self._booking(Booking.Status.APPROVED)
+        self.assertEqual(len(self._event_starts(booking.id)), 1)  # прогріваємо кеш
+
+        booking = Booking.objects.get(id=booking.id)
+        booking.start += timedelta(days=7)
+        booking.end += timedelta(days=7)
+        booking.save()
+
+        self.assertEqual(self._event_starts(booking.id), [booking.start])
+
+    def test_approve_shows_booking_to_others(self):
+        booking = self._booking(Booking.Status.PENDING)
+        self.assertEqual(self._event_starts(booking.id), [])
+
+        self.client.force_login(self.staff)
+        resp = self.client.post(f"/api/bookings/{booking.id}/approve/")
+        self.assertEqual(resp.status_code, 200, resp.content)
+
+        self.assertEqual(len(self._event_starts(booking.id)), 1)
+
+    def test_cancel_hides_booking(self):
+        booking = self._booking(Booking.Status.APPROVED)
+        self.assertEqual(len(self._event_starts(booking.id)), 1)
+
+        self.client.force_login(self.staff)
+        resp = self.client.post(f"/api/bookings/{booking.id}/cancel/")
+        self.assertEqual(resp.status_code, 200, resp.content)
+
+        self.assertEqual(self._event_starts(booking.id), [])
+
+    def test_rename_user_updates_cached_events(self):
+        self._booking(Booking.Status.APPROVED)
+        self.assertIn('"boss"', self._events())
+
+        self.staff.username = "chief"
+        self.staff.save()
 
-# Create your tests here.
+        events = self._events()
+        self.assertIn('"chief"', events)
+        self.assertNotIn('"boss"', events)
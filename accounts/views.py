@@ -1,20 +1,27 @@
+from django.conf import settings
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth import authenticate, get_user_model, login, logout
 from django.contrib.auth.decorators import login_required
-from django.contrib.auth.password_validation import validate_password
-from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
 from django.db.models import Q
 from django.http import HttpResponseForbidden
 from django.shortcuts import get_object_or_404, redirect, render
+from django.utils.functional import SimpleLazyObject
 from django.views.decorators.csrf import ensure_csrf_cookie
 from django.views.decorators.http import require_http_methods
 
 from .models import Booking, MeetingRoom
+from .services import (
+    PENDING_CACHE_TIMEOUT,
+    ROOM_FLAGS,
+    get_rooms_list,
+    is_username_conflict,
+    password_error,
+    pending_bookings_version,
+)
 
 User = get_user_model()
 
-MIN_PASSWORD_LEN = 6
-
 
 # ---------------------------
 # public
@@ -26,7 +33,14 @@ def home(request):
 @ensure_csrf_cookie
 @login_required
 def calendar_view(request):
-    return render(request, "calendar/index.html")
+    return render(
+        request,
+        "calendar/index.html",
+        {
+            "work_start": settings.BOOKING_WORK_START,
+            "work_end": settings.BOOKING_WORK_END,
+        },
+    )
 
 
 @require_http_methods(["GET", "POST"])
@@ -67,20 +81,13 @@ def _bool_from_post(post, name: str) -> bool:
 
 def _room_flags_from_post(post) -> dict:
     # чекбокси -> boolean поля
-    return {
-        "has_projector": _bool_from_post(post, "has_projector"),
-        "has_speakerphone": _bool_from_post(post, "has_speakerphone"),
-        "has_tv": _bool_from_post(post, "has_tv"),
-        "has_whiteboard": _bool_from_post(post, "has_whiteboard"),
-    }
+    return {flag: flag in post for flag in ROOM_FLAGS}
 
 
 def _parse_capacity(value) -> int:
+    # у формі тільки цифри; мінус і сміття -> 0 (поле PositiveIntegerField)
     value = (value or "").strip()
-    try:
-        return int(value)
-    except (TypeError, ValueError):
-        return 0
+    return int(value) if value.isdecimal() else 0
 
 
 # ---------------------------
@@ -101,8 +108,7 @@ def admin_rooms(request):
         )
         return redirect("admin_rooms")
 
-    rooms = MeetingRoom.objects.all().order_by("name")
-    return render(request, "admin/rooms.html", {"rooms": rooms})
+    return render(request, "admin/rooms.html", {"rooms": get_rooms_list()})
 
 
 @staff_member_required
@@ -114,13 +120,10 @@ def admin_room_edit(request, room_id):
         room.name = (request.POST.get("name") or "").strip()
         room.capacity = _parse_capacity(request.POST.get("capacity"))
 
-        flags = _room_flags_from_post(request.POST)
-        room.has_projector = flags["has_projector"]
-        room.has_speakerphone = flags["has_speakerphone"]
-        room.has_tv = flags["has_tv"]
-        room.has_whiteboard = flags["has_whiteboard"]
+        for flag, value in _room_flags_from_post(request.POST).items():
+            setattr(room, flag, value)
 
-        room.save()
+        room.save(update_fields=["name", "capacity", *ROOM_FLAGS])
         return redirect("admin_rooms")
 
     return render(request, "admin/room_edit.html", {"room": room})
@@ -146,6 +149,7 @@ def admin_users(request):
     users = User.objects.all().order_by("username")
 
     if q:
+        # icontains по кожному полю — у Postgres це trigram GIN (міграція 0009)
         users = users.filter(
             Q(username__icontains=q)
             | Q(email__icontains=q)
@@ -159,21 +163,6 @@ def admin_users(request):
     return render(request, "admin/users.html", {"users": users, "q": q, "active": active})
 
 
-def _password_error(password1: str, password2: str) -> str | None:
-    if password1 != password2:
-        return "Паролі не співпадають."
-    if len(password1) < MIN_PASSWORD_LEN:
-        return f"Пароль має бути мінімум {MIN_PASSWORD_LEN} символів."
-
-    try:
-        validate_password(password1)
-    except ValidationError as e:
-        # Django повертає список повідомлень
-        return " ".join(e.messages)
-
-    return None
-
-
 @staff_member_required
 @require_http_methods(["GET", "POST"])
 def admin_create_user(request):
@@ -194,10 +183,8 @@ def admin_create_user(request):
 
         if not username:
             error = "Username обовʼязковий."
-        elif User.objects.filter(username=username).exists():
-            error = "Такий username вже існує."
         else:
-            error = _password_error(password1, password2)
+            error = password_error(password1, password2)
 
         if not error:
             user = User(
@@ -210,16 +197,45 @@ def admin_create_user(request):
                 is_active=is_active,
             )
             user.set_password(password1)
-            user.save()
-            return redirect("admin_users")
+
+            # унікальність username перевіряє БД — один INSERT без попереднього SELECT
+            try:
+                with transaction.atomic():
+                    user.save()
+            except IntegrityError as exc:
+                if not is_username_conflict(exc):
+                    raise
+                error = "Такий username вже існує."
+            else:
+                return redirect("admin_users")
 
     return render(request, "admin/user_create.html", {"error": error})
 
 
+# поля, які показують сторінки користувача (без password, date_joined, ...)
+_USER_DETAIL_FIELDS = (
+    "id",
+    "username",
+    "email",
+    "first_name",
+    "last_name",
+    "is_staff",
+    "is_active",
+    "last_login",
+)
+
+
+def _get_user_for_admin(request, user_id: int, fields=_USER_DETAIL_FIELDS):
+    # свій запис уже завантажений у request.user — без повторного SELECT
+    if user_id == request.user.id:
+        return request.user
+    return get_object_or_404(User.objects.only(*fields), id=user_id)
+
+
 @staff_member_required
 @require_http_methods(["GET", "POST"])
 def admin_user_detail(request, user_id):
-    user = get_object_or_404(User, id=user_id)
+    user = _get_user_for_admin(request, user_id)
 
     error = None
     saved = False
@@ -245,7 +261,7 @@ def admin_user_detail(request, user_id):
 @staff_member_required
 @require_http_methods(["POST"])
 def admin_user_toggle_active(request, user_id):
-    user = get_object_or_404(User, id=user_id)
+    user = _get_user_for_admin(request, user_id, fields=("id", "is_active"))
 
     if user.id == request.user.id:
         return HttpResponseForbidden("Не можна деактивувати самого себе.")
@@ -259,7 +275,7 @@ def admin_user_toggle_active(request, user_id):
 @staff_member_required
 @require_http_methods(["GET", "POST"])
 def admin_user_set_password(request, user_id):
-    user = get_object_or_404(User, id=user_id)
+    user = _get_user_for_admin(request, user_id)
 
     error = None
 
@@ -267,10 +283,10 @@ def admin_user_set_password(request, user_id):
         p1 = request.POST.get("password1") or ""
         p2 = request.POST.get("password2") or ""
 
-        error = _password_error(p1, p2)
+        error = password_error(p1, p2)
         if not error:
             user.set_password(p1)
-            user.save()
+            user.save(update_fields=["password"])
             return redirect("admin_user_detail", user_id=user.id)
 
     return render(request, "admin/user_set_password.html", {"u": user, "error": error})
@@ -279,12 +295,31 @@ def admin_user_set_password(request, user_id):
 # ---------------------------
 # admin: pending bookings
 # ---------------------------
+def _pending_rows() -> list[dict]:
+    # шаблону треба кілька полів — беремо dict-рядки без моделей;
+    # назви кімнат — з кешу списку кімнат, а не JOIN-ом на кожен рядок
+    room_names = {r["id"]: r["name"] for r in get_rooms_list()}
+    rows = list(
+        Booking.objects.filter(status=Booking.Status.PENDING)
+        .values("id", "start", "end", "room_id", "user__username")
+        .order_by("start")
+    )
+    for row in rows:
+        row["room__name"] = room_names.get(row["room_id"], "")
+    return rows
+
+
 @staff_member_required
 @require_http_methods(["GET"])
 def admin_pending_bookings(request):
-    pending = (
-        Booking.objects.select_related("room", "user")
-        .filter(status=Booking.Status.PENDING)
-        .order_by("start")
+    # лінивий список: при влучанні в {% cache %} запиту до БД немає
+    pending = SimpleLazyObject(_pending_rows)
+    return render(
+        request,
+        "admin/pending_bookings.html",
+        {
+            "pending": pending,
+            "pending_version": pending_bookings_version(),
+            "pending_cache_timeout": PENDING_CACHE_TIMEOUT,
+        },
     )
-    return render(request, "admin/pending_bookings.html", {"pending": pending})
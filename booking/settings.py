@@ -49,6 +49,8 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    # лише з DEBUG=True (інакше вимикається сам)
+    "accounts.middleware.SlowBookingQueryMiddleware",
 ]
 
 ROOT_URLCONF = "booking.urls"
@@ -83,6 +85,33 @@ DATABASES = {
 }
 
 
+# ========================
+# CACHE
+# ========================
+# REDIS_URL (напр. redis://localhost:6379/0) — спільний кеш для всіх воркерів
+# gunicorn, потрібен пакет redis. Без нього — locmem, окремий у кожному процесі:
+# інвалідація тоді видна лише воркеру, що її зробив, тож accounts.services
+# тримає TTL короткими (CACHE_IS_SHARED).
+REDIS_URL = os.environ.get("REDIS_URL", "")
+CACHE_IS_SHARED = bool(REDIS_URL)
+
+if CACHE_IS_SHARED:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            # календар кешується по (кімната, тиждень) — дефолтних 300 замало
+            "OPTIONS": {"MAX_ENTRIES": 5000},
+        }
+    }
+
+
 # ========================
 # PASSWORD VALIDATION
 # ========================
@@ -94,6 +123,15 @@ AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.NumericPasswordValidator"},
 ]
 
+# нові паролі — Argon2 (argon2-cffi, нативний код) замість PBKDF2 на ~1M ітерацій;
+# старі PBKDF2-хеші й далі перевіряються і перехешовуються при вході
+PASSWORD_HASHERS = [
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+
 
 # ========================
 # INTERNATIONALIZATION
@@ -109,6 +147,16 @@ DATETIME_FORMAT = "d.m.Y H:i"
 TIME_FORMAT = "H:i"
 
 
+# ========================
+# BOOKING POLICY
+# ========================
+# робочий час для бронювань, у локальному часі (TIME_ZONE)
+
+BOOKING_WORK_DAYS = [0, 1, 2, 3, 4]  # Пн–Пт
+BOOKING_WORK_START = "08:00"
+BOOKING_WORK_END = "20:00"  # кінець може бути рівно о BOOKING_WORK_END
+
+
 # ========================
 # STATIC FILES
 # ========================
@@ -128,3 +176,33 @@ LOCALE_PATHS = [
 LOGIN_URL = "/login/"
 LOGIN_REDIRECT_URL = "/calendar/"
 LOGOUT_REDIRECT_URL = "/login/"
+
+
+# ========================
+# PERF LOGGING (DEBUG)
+# ========================
+# SlowBookingQueryMiddleware: повільні SELECT-и по бронюваннях + EXPLAIN
+PERF_SLOW_QUERY_MS = int(os.environ.get("PERF_SLOW_QUERY_MS", "5"))
+
+# SQL_LOG=true — друкувати всі SQL-запити (django.db.backends пише лише з DEBUG)
+SQL_LOG = os.environ.get("SQL_LOG", "False").lower() == "true"
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "perf": {
+            "handlers": ["console"],
+            "level": "DEBUG" if DEBUG else "WARNING",
+            "propagate": False,
+        },
+        "django.db.backends": {
+            "handlers": ["console"],
+            "level": "DEBUG" if SQL_LOG else "INFO",
+            "propagate": False,
+        },
+    },
+}
@@ -0,0 +1,19 @@
+# Generated by Django 6.0.2 on 2026-10-15 21:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0004_alter_booking_options_alter_room_options_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('status__in', ['PENDING', 'APPROVED'])), fields=['room', 'start', 'end'], name='booking_active_room_time_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+from django.db import migrations
+
+
+# EXCLUDE-констрейнт є тільки в Postgres; на інших БД перетини
+# й далі перевіряє Booking.clean()
+CONSTRAINT_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS btree_gist",
+    'ALTER TABLE booking_booking ADD CONSTRAINT booking_no_overlap '
+    'EXCLUDE USING gist (room_id WITH =, tstzrange("start", "end") WITH &&) '
+    "WHERE (status IN ('PENDING', 'APPROVED'))",
+]
+
+
+def add_no_overlap(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    for sql in CONSTRAINT_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_no_overlap(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    schema_editor.execute(
+        "ALTER TABLE booking_booking DROP CONSTRAINT IF EXISTS booking_no_overlap"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("booking", "0005_booking_active_room_time_idx"),
+    ]
+
+    operations = [
+        migrations.RunPython(add_no_overlap, drop_no_overlap),
+    ]
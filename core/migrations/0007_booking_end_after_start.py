@@ -0,0 +1,19 @@
+# Generated by Django 6.0.2 on 2026-10-15 21:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0006_booking_no_overlap'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='booking',
+            constraint=models.CheckConstraint(condition=models.Q(('start__lt', models.F('end'))), name='booking_booking_end_after_start'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+from django.db import migrations
+
+
+# той самий день і робочий час — у локальному часі, як у Booking.clean().
+# Тільки Postgres: на SQLite такі вирази потребують Python-функцій Django.
+# Значення зафіксовані на момент міграції (TIME_ZONE, BOOKING_WORK_START/END):
+# якщо політика зміниться — потрібна нова міграція з оновленими CHECK-ами.
+CONSTRAINT_NAMES = ("booking_same_day", "booking_work_hours")
+
+START = "(\"start\" AT TIME ZONE 'Europe/Kyiv')"
+END = "(\"end\" AT TIME ZONE 'Europe/Kyiv')"
+
+# NOT VALID: старі рядки не перевіряємо, нові — так
+CONSTRAINT_SQL = [
+    "ALTER TABLE booking_booking ADD CONSTRAINT booking_same_day "
+    f"CHECK ({START}::date = {END}::date) NOT VALID",
+    "ALTER TABLE booking_booking ADD CONSTRAINT booking_work_hours "
+    f"CHECK ({START}::time >= '08:00' AND {START}::time < '20:00' "
+    f"AND {END}::time > '08:00' AND {END}::time <= '20:00') NOT VALID",
+]
+
+
+def add_checks(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    for sql in CONSTRAINT_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_checks(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    for name in CONSTRAINT_NAMES:
+        schema_editor.execute(f"ALTER TABLE booking_booking DROP CONSTRAINT IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("booking", "0007_booking_end_after_start"),
+    ]
+
+    operations = [
+        migrations.RunPython(add_checks, drop_checks),
+    ]
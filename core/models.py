@@ -2,8 +2,11 @@ from datetime import time
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db import models
-from django.db.models import Q
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .services import pg_constraint_name, pg_sqlstate
 
 
 class Room(models.Model):
@@ -20,7 +23,7 @@ class Booking(models.Model):
     """
     Бронювання кімнати.
 
-    Робочий час: 08:00–20:00
+    Робочий час: settings.BOOKING_WORK_START–BOOKING_WORK_END
     Перетини заборонені для активних бронювань (PENDING + APPROVED)
     """
 
@@ -29,8 +32,16 @@ class Booking(models.Model):
         APPROVED = "APPROVED", "Підтверджено"
         REJECTED = "REJECTED", "Відхилено"
 
-    WORK_START = time(8, 0)
-    WORK_END = time(20, 0)
+    WORK_START = time.fromisoformat(settings.BOOKING_WORK_START)
+    WORK_END = time.fromisoformat(settings.BOOKING_WORK_END)
+
+    OVERLAP_ERROR = "Цей час уже зайнятий для вибраної кімнати."
+    # CHECK-констрейнт -> повідомлення для форми (ті самі правила, що й у clean())
+    CHECK_ERRORS = {
+        "booking_booking_end_after_start": "Кінець має бути після початку.",
+        "booking_same_day": "Бронювання має бути в межах одного дня.",
+        "booking_work_hours": f"Бронювання має бути в робочий час ({WORK_START:%H:%M}–{WORK_END:%H:%M}).",
+    }
 
     room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name="bookings")
 
@@ -61,35 +72,88 @@ class Booking(models.Model):
 
     class Meta:
         ordering = ["-start"]
+        indexes = [
+            # тільки активні бронювання (PENDING + APPROVED) — для перевірки перетину
+            models.Index(
+                fields=["room", "start", "end"],
+                name="booking_active_room_time_idx",
+                condition=Q(status__in=["PENDING", "APPROVED"]),
+            ),
+        ]
+        # той самий день і робочий час у Postgres — CHECK-и з міграції 0008
+        # (значення там зафіксовані: зміна політики = нова міграція)
+        constraints = [
+            models.CheckConstraint(
+                condition=Q(start__lt=F("end")),
+                name="booking_booking_end_after_start",
+            ),
+        ]
 
     def clean(self):
         # базове
         if self.end <= self.start:
             raise ValidationError("Кінець має бути після початку.")
 
+        # локальний час (TIME_ZONE), як і в CHECK-констрейнтах
+        start = timezone.localtime(self.start)
+        end = timezone.localtime(self.end)
+
         # не даємо тягнути бронювання на інший день (спрощує життя і календар)
-        if self.start.date() != self.end.date():
+        if start.date() != end.date():
             raise ValidationError("Бронювання має бути в межах одного дня.")
 
         # робочий час
-        s = self.start.astimezone().time()
-        e = self.end.astimezone().time()
+        s = start.time()
+        e = end.time()
 
         if not (self.WORK_START <= s < self.WORK_END):
-            raise ValidationError("Початок має бути в робочий час (08:00–20:00).")
+            raise ValidationError(
+                f"Початок має бути в робочий час ({self.WORK_START:%H:%M}–{self.WORK_END:%H:%M})."
+            )
         if not (self.WORK_START < e <= self.WORK_END):
-            raise ValidationError("Кінець має бути в робочий час (08:00–20:00).")
-
-        # перетин: перевіряємо тільки активні бронювання
-        qs = Booking.objects.filter(room=self.room).filter(
-            Q(status=Booking.Status.PENDING) | Q(status=Booking.Status.APPROVED)
+            raise ValidationError(
+                f"Кінець має бути в робочий час ({self.WORK_START:%H:%M}–{self.WORK_END:%H:%M})."
+            )
+
+        # у Postgres перетини відсікає EXCLUDE-констрейнт booking_no_overlap
+        # (міграція 0006) — зайвий SELECT не робимо, помилку ловить save()
+        if connection.vendor == "postgresql":
+            return
+
+        # перетин: перевіряємо тільки активні бронювання — одним Q;
+        # status__in збігається з умовою індексу booking_active_room_time_idx
+        q = Q(
+            room_id=self.room_id,
+            status__in=[Booking.Status.PENDING, Booking.Status.APPROVED],
+            start__lt=self.end,
+            end__gt=self.start,
         )
         if self.pk:
-            qs = qs.exclude(pk=self.pk)
-
-        overlap = qs.filter(start__lt=self.end, end__gt=self.start).exists()
-        if overlap:
-            raise ValidationError("Цей час уже зайнятий для вибраної кімнати.")
+            q &= ~Q(pk=self.pk)
+
+        if Booking.objects.filter(q).exists():
+            raise ValidationError(self.OVERLAP_ERROR)
+
+    def save(self, *args, **kwargs):
+        # констрейнти, які варто ловити, є лише в Postgres — на інших БД
+        # не додаємо зайвих SAVEPOINT/RELEASE до кожного запису
+        if connection.vendor != "postgresql":
+            return super().save(*args, **kwargs)
+
+        # savepoint, щоб порушення констрейнта не ламало зовнішню транзакцію
+        try:
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+        except IntegrityError as exc:
+            code = pg_sqlstate(exc)
+            # 23P01 = exclusion_violation
+            if code == "23P01":
+                raise ValidationError(self.OVERLAP_ERROR) from exc
+            # 23514 = check_violation; повідомлення — за іменем констрейнта
+            message = self.CHECK_ERRORS.get(pg_constraint_name(exc))
+            if code == "23514" and message:
+                raise ValidationError(message) from exc
+            raise
 
     def __str__(self) -> str:
         return f"{self.room} | {self.start:%Y-%m-%d %H:%M}—{self.end:%H:%M} | {self.get_status_display()}"
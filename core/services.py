@@ -1,6 +1,18 @@
 from django.utils import timezone
 
 
+def pg_sqlstate(exc) -> str | None:
+    """SQLSTATE of a DB error's driver cause (psycopg 3: sqlstate, psycopg2: pgcode)."""
+    cause = exc.__cause__
+    return getattr(cause, "sqlstate", None) or getattr(cause, "pgcode", None)
+
+
+def pg_constraint_name(exc) -> str | None:
+    """Name of the violated constraint, if the driver reports it (psycopg diag)."""
+    diag = getattr(exc.__cause__, "diag", None)
+    return getattr(diag, "constraint_name", None)
+
+
 def assert_no_conflict(BookingModel, *, room_id, start, end, exclude_id=None):
    
     if not start or not end: